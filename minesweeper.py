@@ -2,6 +2,9 @@ import itertools
 import random
 import sys
 
+# Relative positions of the 8 cells surrounding a cell
+_NEIGHBOR_OFFSETS = tuple((di, dj) for di in (-1, 0, 1) for dj in (-1, 0, 1) if (di, dj) != (0, 0))
+
 class Minesweeper():
     """
     Minesweeper game representation
@@ -15,20 +18,13 @@ class Minesweeper():
         self.mines = set()
 
         # Initialize an empty field with no mines
-        self.board = []
-        for i in range(self.height):
-            row = []
-            for j in range(self.width):
-                row.append(False) # FALSE = SAFE CELL
-            self.board.append(row)
+        self.board = [[False] * self.width for _ in range(self.height)] # FALSE = SAFE CELL
 
         # Add mines randomly
-        while len(self.mines) != mines: # NOT IT IS ADDING 8 MINES
-            i = random.randrange(height)
-            j = random.randrange(width)
-            if not self.board[i][j]:
-                self.mines.add((i, j)) # A cell is a TUPLE (i,j) type
-                self.board[i][j] = True # TRUE = MINE CELL
+        flat = random.sample(range(self.height * self.width), mines)
+        self.mines = {(k // self.width, k % self.width) for k in flat} # A cell is a TUPLE (i,j) type
+        for i, j in self.mines:
+            self.board[i][j] = True # TRUE = MINE CELL
 
         # At first, player has found no mines
         self.mines_found = set()
@@ -43,15 +39,9 @@ class Minesweeper():
         Prints a text-based representation
         of where mines are located.
         """
-        for i in range(self.height):
-            print("--" * self.width + "-")
-            for j in range(self.width):
-                if self.board[i][j]:
-                    print("|X", end="")
-                else:
-                    print("| ", end="")
-            print("|")
-        print("--" * self.width + "-")
+        sep = "--" * self.width + "-\n"
+        rows = [sep + "".join("|X" if c else "| " for c in row) + "|\n" for row in self.board]
+        sys.stdout.write("".join(rows) + sep)
 
     def is_mine(self, cell):
         i, j = cell
@@ -64,22 +54,14 @@ class Minesweeper():
         not including the cell itself.
         """
 
-        # Keep count of nearby mines
-        count = 0
-
-        # Loop over all cells within one row and column
-        for i in range(cell[0] - 1, cell[0] + 2):
-            for j in range(cell[1] - 1, cell[1] + 2):
-
-                # Ignore the cell itself
-                if (i, j) == cell:
-                    continue
-
-                # Update count if cell in bounds and is mine
-                if 0 <= i < self.height and 0 <= j < self.width:
-                    if self.board[i][j]:
-                        count += 1
+        i, j = cell
 
+        # Count the in-bounds neighbours that are mines (True counts as 1)
+        count = 0
+        for di, dj in _NEIGHBOR_OFFSETS:
+            ni, nj = i + di, j + dj
+            if 0 <= ni < self.height and 0 <= nj < self.width:
+                count += self.board[ni][nj]
         return count
 
     def won(self):
@@ -97,13 +79,18 @@ class Sentence():
     """
 
     def __init__(self, cells, count):
-        self.cells = set(cells)
+        self.cells = frozenset(cells)
         self.count = count
         #print(f"Sentence.init: {{ {self.cells} }}, count {self.count}")
 
     def __eq__(self, other):
         return self.cells == other.cells and self.count == other.count
 
+    # The hash follows cells and count, which mark_mine/mark_safe and the AI change in place:
+    # never keep a Sentence in a set or dict key across such a change
+    def __hash__(self):
+        return hash((self.cells, self.count))
+
     def __str__(self):
         return f"{self.cells} = {self.count}"
 
@@ -120,7 +107,7 @@ class Sentence():
         """
         Returns the set of all cells in self.cells known to be safe.
         """
-        if self.count==0:
+        if self.count==0 and self.cells:
             #print(f"Sentence.known_safes(): deducing that {self.cells} with count {self.count} are SAFES")
             return self.cells
         return set()
@@ -132,7 +119,7 @@ class Sentence():
         """
         if cell in self.cells:
             self.count = self.count-1
-            self.cells.remove(cell)
+            self.cells = self.cells - {cell}
 
     def mark_safe(self, cell):
         """
@@ -140,7 +127,7 @@ class Sentence():
         a cell is known to be safe.
         """
         if cell in self.cells:
-            self.cells.remove(cell)
+            self.cells = self.cells - {cell}
 
 class MinesweeperAI():
     """
@@ -160,9 +147,22 @@ class MinesweeperAI():
         self.mines = set()
         self.safes = set()
 
+        # Known safe cells that have not been clicked on yet
+        self._unused_safes = set()
+
         # List of sentences about the game known to be true
+        # (add sentences through _add_sentence, so mark_mine/mark_safe can find them)
         self.knowledge = []
 
+        # Print the AI's status after every move when set
+        self.debug = False
+
+        # Sentences in the knowledge base that mention each cell, keyed by id(sentence)
+        self._cell_to_sentences = {}
+
+        # Every cell on the board, for choosing random moves
+        self._all_cells = frozenset(itertools.product(range(height), range(width)))
+
 
     def mark_mine(self, cell):
         """
@@ -170,7 +170,7 @@ class MinesweeperAI():
         to mark that cell as a mine as well.
         """
         self.mines.add(cell)
-        for sentence in self.knowledge:
+        for sentence in self._cell_to_sentences.pop(cell, {}).values():
             sentence.mark_mine(cell)
 
     def mark_safe(self, cell):
@@ -179,9 +179,31 @@ class MinesweeperAI():
         to mark that cell as safe as well.
         """
         self.safes.add(cell)
-        for sentence in self.knowledge:
+        if cell not in self.moves_made:
+            self._unused_safes.add(cell)
+        for sentence in self._cell_to_sentences.pop(cell, {}).values():
             sentence.mark_safe(cell)
 
+    def _add_sentence(self, sentence):
+        """
+        Adds a sentence to the knowledge base and indexes it by its cells.
+        """
+        self.knowledge.append(sentence)
+        for c in sentence.cells:
+            self._cell_to_sentences.setdefault(c, {})[id(sentence)] = sentence
+
+    def _unindex_sentence(self, sentence):
+        """
+        Removes a sentence from the cell index.
+        The caller is responsible for dropping it from self.knowledge.
+        """
+        for c in sentence.cells:
+            entries = self._cell_to_sentences.get(c)
+            if entries is not None:
+                entries.pop(id(sentence), None)
+                if not entries:
+                    del self._cell_to_sentences[c]
+
 
     def add_knowledge(self, cell, count):
         """
@@ -200,104 +222,107 @@ class MinesweeperAI():
                if they can be inferred from existing knowledge
         """
         self.moves_made.add(cell) # Register new move
-        self.mark_safe(cell)    # Mark current cell as safe
-
-        # Find all neighboors of 'cell'
-        cell_neighbors = set()
-        cell_count = count
-        for i in range(cell[0] - 1, cell[0] + 2):
-            for j in range(cell[1] - 1, cell[1] + 2):
-                # Ignore the cell itself
-                if (i, j) == cell:
-                    continue
-                # Add This mine if in bounds and is neighboor of cell
-                if 0 <= i < self.height and 0 <= j < self.width:
-                    if (not (i,j) in self.mines) and (not (i,j) in self.moves_made):
-                        cell_neighbors.add((i,j))
-                    if (i,j) in self.mines:
-                        cell_count = cell_count-1
+        self._unused_safes.discard(cell)
+
+        # Find all in-bounds neighboors of 'cell'
+        ci, cj = cell
+        candidates = [(ci + di, cj + dj) for di, dj in _NEIGHBOR_OFFSETS
+                      if 0 <= ci + di < self.height and 0 <= cj + dj < self.width]
+        # Keep only the undetermined ones, discounting the neighboors already known to be mines
+        cell_neighbors = {c for c in candidates if c not in self.mines and c not in self.safes}
+        cell_count = count - sum(1 for c in candidates if c in self.mines)
 
         # Make a Sentence with all neighboors of 'cell', using 'count'
         sentence_i = Sentence(cell_neighbors, cell_count) #
 
         # Add the new sentence to the knowledge base
-        self.knowledge.append(sentence_i)
+        self._add_sentence(sentence_i)
+
+        # Mark current cell as safe, along with every safe and mine cell that follows from it
+        self._propagate({cell}, set(), [sentence_i])
 
-        # Update the knowledge base to mark all newlyfound safe and mine cells
-        # Removes empty sentences and sentences that are known to be all mines or all safes
-        while(self.remove_empties_and_safes_and_Mines() or self.update_mines_and_safes_in_KB() ):
-            pass
         # This block is for inferring new sentences
-        # Copmrares every sentence in Knowledge against other sentences in Knowledge
-        i_max = len(self.knowledge)
-        while i < i_max:
-            j_max = len(self.knowledge)
-            while j < j_max:
-                # Same Sentence in i and j: skip
-                if (i == j):
-                    j += 1
-                    continue
-                # Different Sentences are Equivalent . Remove One of them (j)
-                if(self.knowledge[i] == self.knowledge[j]):
-                    self.knowledge.remove(self.knowledge[j])
-                    i_max -= 1
-                    j_max -= 1
-                    if j<i :
-                        i -= 1
-                    continue
-                # Current Sentence_j is a proper subset of Sentence_i: Sentence_i-Sentence_j = New_Sentence, with new count = i_count-j_count
-                if self.knowledge[j].cells < self.knowledge[i].cells:
-                    new_set = self.knowledge[i].cells.difference(self.knowledge[j].cells)
-                    tci = self.knowledge[i].count # Substracting self.knowledge[i].count-self.knowledge[j].count modifies count of sentence [i]
-                    tcj = self.knowledge[j].count
-                    new_count = tci - tcj
-                    new_sentence = Sentence(new_set, new_count)
-                    self.knowledge.append(new_sentence)
-                j += 1
-            i += 1
-
-        # Update the knowledge base to mark all newlyfound safe and mine cells
-        # Removes empty sentences and sentences that are known to be all mines or all safes
-        while(self.remove_empties_and_safes_and_Mines() or self.update_mines_and_safes_in_KB() ):
-            pass
-        self.print_aiStatus("ai.Status")
-
-    def update_mines_and_safes_in_KB(self):
-        anyModifications = False
-        # Update all Sentences in KB with cells known to be mines
-        for safe_cell_i in self.safes.copy():
-            for sentence in self.knowledge.copy():
-                if(safe_cell_i in sentence.cells):
-                    anyModifications = True
-                sentence.mark_safe(safe_cell_i)
-        # Update all Sentences in KB with cells known to be safes
-        for mine_cell_i in self.mines.copy():
-            for sentence in self.knowledge.copy():
-                if(mine_cell_i in sentence.cells):
-                    anyModifications = True
-                sentence.mark_safe(mine_cell_i)
-        return anyModifications
-
-    def remove_empties_and_safes_and_Mines(self):
-        anyRemovals = False
-        for i_sentence in self.knowledge.copy():
-            # Remove empty Sentences from Knowledge
-            if len(i_sentence.cells)==0:
-                anyRemovals = True
-                self.knowledge.remove(i_sentence)
-            # Remove Sentences from kB whose cells are all mines
-            elif i_sentence.known_mines():
-                anyRemovals = True
-                for cofirmed_mine in i_sentence.known_mines().copy():
-                    self.mark_mine(cofirmed_mine)
-                self.knowledge.remove(i_sentence)
-            # Remove Sentences from KB whose cells are all safes
-            elif i_sentence.known_safes():
-                anyRemovals = True
-                for confirmed_safe in i_sentence.known_safes().copy():
-                    self.mark_safe(confirmed_safe)
-                self.knowledge.remove(i_sentence)
-        return anyRemovals
+        # Compares every sentence in Knowledge against the larger sentences in Knowledge
+        self.knowledge.sort(key=lambda s: len(s.cells))
+        new_pairs = []
+        for k, s_small in enumerate(self.knowledge):
+            for s_big in itertools.islice(self.knowledge, k + 1, None):
+                # Sentence_small is a proper subset of Sentence_big: Sentence_big-Sentence_small = New_Sentence, with new count = big_count-small_count
+                if s_small.cells < s_big.cells:
+                    new_pairs.append((s_big.cells - s_small.cells, s_big.count - s_small.count))
+        # Only build Sentences for inferred (cells, count) pairs not already known
+        existing = {(s.cells, s.count) for s in self.knowledge}
+        new_sentences = []
+        for pair in new_pairs:
+            if pair not in existing:
+                existing.add(pair)
+                new_sentences.append(Sentence(pair[0], pair[1]))
+        for new_sentence in new_sentences:
+            self._add_sentence(new_sentence)
+
+        # Resolve the inferred sentences against the knowledge base
+        self._propagate(set(), set(), new_sentences)
+
+        # Equivalent Sentences carry the same information: keep only the first of each
+        # (Sentence hashes on its cells and count, so this is one dict insertion per sentence)
+        unique = {}
+        for sentence in self.knowledge:
+            if sentence in unique:
+                self._unindex_sentence(sentence)
+            else:
+                unique[sentence] = sentence
+        self.knowledge = list(unique)
+
+        if self.debug:
+            self.print_aiStatus("ai.Status")
+
+    def _propagate(self, new_safes, new_mines, pending=()):
+        """
+        Marks newly known safe and mine cells, then checks only the sentences
+        that mention them (plus any `pending` sentences just added), removing
+        empty sentences and sentences that are known to be all mines or all safes.
+        Repeats only while that uncovers further safes or mines.
+        """
+        pending = list(pending)
+        while True:
+            self.safes |= new_safes
+            self.mines |= new_mines
+            self._unused_safes |= new_safes - self.moves_made
+            # Gather each affected sentence once and strip all newly known cells in one set operation
+            all_known = new_safes | new_mines
+            touched = {}
+            for c in all_known:
+                touched.update(self._cell_to_sentences.pop(c, {}))
+            for sentence in touched.values():
+                sentence.count -= len(sentence.cells & new_mines)
+                sentence.cells -= all_known
+            pending.extend(touched.values())
+            # Cells are only collected here; they are marked on the next round, after the traversal
+            resolved = {}
+            found_safes = set()
+            found_mines = set()
+            for sentence in pending:
+                # Drop empty Sentences from Knowledge
+                if not sentence.cells:
+                    resolved[id(sentence)] = sentence
+                # Same conditions as known_mines()/known_safes(), checked inline since cells are non-empty here
+                # Drop Sentences from KB whose cells are all mines
+                elif len(sentence.cells) == sentence.count:
+                    resolved[id(sentence)] = sentence
+                    found_mines |= sentence.cells
+                # Drop Sentences from KB whose cells are all safes
+                elif sentence.count == 0:
+                    resolved[id(sentence)] = sentence
+                    found_safes |= sentence.cells
+            if resolved:
+                for sentence in resolved.values():
+                    self._unindex_sentence(sentence)
+                self.knowledge = [s for s in self.knowledge if id(s) not in resolved]
+            new_safes = found_safes - self.safes
+            new_mines = found_mines - self.mines
+            if not (new_safes or new_mines):
+                return
+            pending = []
 
     def make_safe_move(self):
         """
@@ -308,10 +333,7 @@ class MinesweeperAI():
         This function may use the knowledge in self.mines, self.safes
         and self.moves_made, but should not modify any of those values.
         """
-        for safe_move in self.safes:
-            if (safe_move not in self.moves_made) and (safe_move not in self.mines):
-                return safe_move
-        return None #"None"
+        return next(iter(self._unused_safes), None)
 
     def make_random_move(self):
         """
@@ -320,13 +342,8 @@ class MinesweeperAI():
             1) have not already been chosen, and
             2) are not known to be mines
         """
-
-        for i in range(self.height):
-            for j in range(self.width):
-                random_cell = (i,j)
-                if (random_cell not in self.moves_made) and (random_cell not in self.mines):
-                    return random_cell
-        return None
+        available = self._all_cells - self.moves_made - self.mines
+        return random.choice(list(available)) if available else None
 
     def print_aiStatus(self, message):
         print(f"{message.upper()}\n\tai.moves_made: {self.moves_made}\n\tai.mines: {self.mines}, \n\tai.safes: {self.safes}, \n\tai.knowledge: ")